@@ -8,17 +8,311 @@ Generate images via HuggingFace (free) or OpenAI DALL-E API (paid)
 import os
 import sys
 import io
+import re
+import json
+import base64
+import time
+import asyncio
+import shutil
+import tempfile
+import threading
+import traceback
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from pathlib import Path
 import argparse
 
-# Set output encoding
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
+# Set output encoding (in place, so already buffered output is kept)
+for _stream in (sys.stdout, sys.stderr):
+    if hasattr(_stream, 'reconfigure'):
+        _stream.reconfigure(encoding='utf-8')
 
+# .env lines holding API keys, and which key each variable maps to
+_ENV_RE = re.compile(rb'^(OPENAI_API_KEY|HUGGINGFACE_API_KEY|HF_TOKEN)=(.*)$')
+_ENV_KEYS = {
+    'OPENAI_API_KEY': 'openai',
+    'HUGGINGFACE_API_KEY': 'huggingface',
+    'HF_TOKEN': 'huggingface',
+}
+
+# Anything but ASCII letters, digits, space, '-' and '_' is unsafe in filenames
+_UNSAFE_FILENAME_RE = re.compile(r'[^A-Za-z0-9 _-]')
+
+# Where the last successful request time per HF model is kept between runs
+_HF_STATE_FILE = Path.home() / '.cache' / 'cursor-image-generator' / 'hf_state.json'
+# A model that answered within this many seconds is assumed to still be warm
+_HF_WARM_WINDOW = 300
+
+# In-memory copy of the state file (loaded on first use) and models already saved this run
+_HF_STATE = None
+_HF_STATE_SAVED = set()
+_HF_STATE_LOCK = threading.Lock()
+
+# Retry 503 (HF model is loading), 504 and 429 up to this many times
+_RETRY_TOTAL = 4
+_RETRY_STATUSES = (503, 504, 429)
+
+# Retry backoff factors: waits are 2x, 4x, 8x the factor between retries
+_WARM_BACKOFF = 1.0
+_COLD_BACKOFF = 5.0
+
+# How long the aiohttp batch connector reuses resolved addresses
+_DNS_CACHE_TTL = 300
+
+# DALL-E price per image by (model, quality, size), USD
+_DALLE_COST = {
+    ('dall-e-3', 'standard', '1024x1024'): 0.04,
+    ('dall-e-3', 'standard', '1792x1024'): 0.08,
+    ('dall-e-3', 'standard', '1024x1792'): 0.08,
+    ('dall-e-3', 'hd', '1024x1024'): 0.08,
+    ('dall-e-3', 'hd', '1792x1024'): 0.12,
+    ('dall-e-3', 'hd', '1024x1792'): 0.12,
+    ('dall-e-2', 'standard', '1024x1024'): 0.02,
+    ('dall-e-2', 'standard', '512x512'): 0.018,
+    ('dall-e-2', 'standard', '256x256'): 0.016,
+}
+
+# Backoff factor for the request running in the current thread (see _AdaptiveRetry)
+_RETRY_BACKOFF = threading.local()
+
+# Shared HTTP session (created on first use)
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _print_retry_notice(status, delay):
+    """Tell the user why the CLI is waiting before the next HF attempt"""
+    print(f"⏳ HuggingFace returned {status} (model may be loading), retrying in {delay:.0f}s...")
+
+
+class _AdaptiveRetry(Retry):
+    """Retry whose backoff factor is picked per request, so one pool serves warm and cold models"""
+    
+    def get_backoff_time(self):
+        # The base schedule uses backoff_factor=1, scale it by the caller's factor
+        factor = getattr(_RETRY_BACKOFF, 'factor', _COLD_BACKOFF)
+        return super().get_backoff_time() * factor
+    
+    def sleep(self, response=None):
+        if response is not None:
+            delay = self.get_retry_after(response)
+            _print_retry_notice(response.status, self.get_backoff_time() if delay is None else delay)
+        super().sleep(response)
+
+
+def _get_session():
+    """Return a shared requests.Session with pooled keep-alive connections"""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            # Retry 503 (HF model is loading), 504 and 429 with exponential backoff
+            # so the request returns as soon as the model is live. Read errors are
+            # not retried: a timed-out POST would resubmit a slow generation.
+            retry = _AdaptiveRetry(
+                total=_RETRY_TOTAL,
+                read=0,
+                backoff_factor=1.0,
+                status_forcelist=_RETRY_STATUSES,
+                allowed_methods=['POST'],
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            _SESSION = session
+        return _SESSION
+
+
+def _load_hf_state():
+    """Load {model: last_success_timestamp} saved by previous runs"""
+    try:
+        with open(_HF_STATE_FILE, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict):
+        return {}
+    # Ignore hand-edited or corrupt entries
+    return {
+        model: last_success for model, last_success in state.items()
+        if isinstance(last_success, (int, float)) and not isinstance(last_success, bool)
+    }
+
+
+def _hf_state():
+    """Return the in-memory HF state, reading the file once per process"""
+    global _HF_STATE
+    if _HF_STATE is None:
+        _HF_STATE = _load_hf_state()
+    return _HF_STATE
+
+
+def _hf_backoff(model):
+    """Pick a short retry backoff if the model answered recently, a long one otherwise"""
+    with _HF_STATE_LOCK:
+        last_success = _hf_state().get(model, 0)
+    if time.time() - last_success < _HF_WARM_WINDOW:
+        return _WARM_BACKOFF
+    return _COLD_BACKOFF
+
+
+def _record_hf_success(model):
+    """
+    Remember that the model is warm
+    
+    The in-memory state is updated on every success; the file is rewritten
+    (best effort, atomic replace) only on the first success per model per run.
+    """
+    with _HF_STATE_LOCK:
+        state = _hf_state()
+        state[model] = time.time()
+        if model in _HF_STATE_SAVED:
+            return
+        _HF_STATE_SAVED.add(model)
+        state = dict(state)
+    
+    try:
+        _HF_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_HF_STATE_FILE.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, _HF_STATE_FILE)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+
+def _hf_error_message(body):
+    """Extract the 'error' field from an HF error body, falling back to the raw text"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    if isinstance(data, dict) and data.get('error'):
+        return data['error']
+    return body[:200] or 'Unknown error'
+
+
+def _sanitize_prompt(prompt):
+    """Turn the first 50 characters of a prompt into a filename-safe string"""
+    return _UNSAFE_FILENAME_RE.sub('_', prompt[:50]).strip().replace(' ', '_')
+
+
+@lru_cache(maxsize=8)
+def _ensured_outdir(output_dir):
+    """Expand ~ in output_dir and create it, once per process per directory"""
+    path = Path(output_dir).expanduser()
+    path.mkdir(parents=True, exist_ok=True)
+    # Plain str so the save path is built without Path objects per image
+    return os.fspath(path)
+
+
+def _create_png(output_dir, prompt, tag=None):
+    """
+    Create a new PNG file named from the timestamp, optional provider tag and prompt
+    
+    The file is created exclusively, so concurrent saves of the same prompt
+    in the same second get a _2, _3, ... suffix instead of overwriting
+    each other.
+    
+    Returns:
+        (path, file) - the path (str) and the file opened for binary writing
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    safe_prompt = _sanitize_prompt(prompt)
+    if tag:
+        stem = f"{timestamp}_{tag}_{safe_prompt}"
+    else:
+        stem = f"{timestamp}_{safe_prompt}"
+    stem = os.path.join(_ensured_outdir(output_dir), stem)
+    
+    n = 1
+    while True:
+        path = f"{stem}.png" if n == 1 else f"{stem}_{n}.png"
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            n += 1
+            continue
+        return path, os.fdopen(fd, 'wb')
+
+
+def _drop_page_cache(f):
+    """
+    Hint the kernel that a written image will not be read back (POSIX only)
+    
+    Dirty pages are not dropped, so the data is synced first; this blocks,
+    so async callers must run it in a worker thread. Failures are ignored:
+    the image is already saved at this point.
+    """
+    if hasattr(os, 'posix_fadvise') and hasattr(os, 'fdatasync'):
+        try:
+            f.flush()
+            os.fdatasync(f.fileno())
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+@contextmanager
+def _png_writer(output_dir, prompt, tag=None):
+    """
+    Create a new PNG file (see _create_png) and yield (path, file)
+    
+    On success the file is closed and dropped from the page cache; if the
+    body raises, the partial file is removed.
+    """
+    output_path, f = _create_png(output_dir, prompt, tag)
+    try:
+        with f:
+            yield output_path, f
+            _drop_page_cache(f)
+    except BaseException:
+        os.unlink(output_path)
+        raise
+
+
+def _save_png(source, output_dir, prompt, tag=None):
+    """
+    Stream image bytes to a uniquely named PNG file
+    
+    Args:
+        source: Binary file-like object with the image (e.g. response.raw)
+        output_dir: Directory to save the image
+        prompt: Prompt used for the filename
+        tag: Optional provider tag added after the timestamp
+    
+    Returns:
+        Path of the saved file (str)
+    """
+    # Stream straight to disk instead of buffering the whole image
+    with _png_writer(output_dir, prompt, tag) as (output_path, f):
+        shutil.copyfileobj(source, f)
+    
+    return output_path
+
+
+@lru_cache(maxsize=1)
 def load_api_keys():
-    """Load API keys (OpenAI and Hugging Face) from configs"""
+    """
+    Load API keys (OpenAI and Hugging Face) from configs
+    
+    The result is cached for the lifetime of the process, so changes to
+    environment variables or config files after the first call are not
+    picked up. Returns a read-only mapping.
+    """
     keys = {
         'openai': None,
         'huggingface': None
@@ -31,18 +325,17 @@ def load_api_keys():
     # Check .env file
     env_file = Path(__file__).parent / '.env'
     if env_file.exists():
-        with open(env_file, 'r') as f:
+        with open(env_file, 'rb') as f:
             for line in f:
-                if line.startswith('OPENAI_API_KEY='):
-                    keys['openai'] = keys['openai'] or line.strip().split('=', 1)[1]
-                elif line.startswith('HUGGINGFACE_API_KEY=') or line.startswith('HF_TOKEN='):
-                    keys['huggingface'] = keys['huggingface'] or line.strip().split('=', 1)[1]
+                m = _ENV_RE.match(line)
+                if m:
+                    name = _ENV_KEYS[m.group(1).decode()]
+                    keys[name] = keys[name] or m.group(2).strip().decode()
     
     # Check ~/.cursor/cli-config.json
     cursor_config = Path.home() / '.cursor' / 'cli-config.json'
     if cursor_config.exists():
         try:
-            import json
             with open(cursor_config, 'r') as f:
                 config = json.load(f)
                 if 'env' in config:
@@ -51,7 +344,7 @@ def load_api_keys():
         except Exception:
             pass
     
-    return keys
+    return MappingProxyType(keys)
 
 
 def generate_image_huggingface(prompt, hf_token, model="black-forest-labs/FLUX.1-schnell", output_dir="~/Downloads"):
@@ -67,8 +360,6 @@ def generate_image_huggingface(prompt, hf_token, model="black-forest-labs/FLUX.1
     Returns:
         Path to saved file or None on error
     """
-    import requests
-    
     print(f"🎨 Generating image via Hugging Face...")
     print(f"📝 Prompt: {prompt}")
     print(f"🤖 Model: {model}")
@@ -79,50 +370,140 @@ def generate_image_huggingface(prompt, hf_token, model="black-forest-labs/FLUX.1
         API_URL = f"https://api-inference.huggingface.co/models/{model}"
         headers = {"Authorization": f"Bearer {hf_token}"}
         
-        response = requests.post(
+        # 503 (model is loading) is retried by the session adapter,
+        # with a shorter backoff if the model was recently warm
+        _RETRY_BACKOFF.factor = _hf_backoff(model)
+        with _get_session().post(
             API_URL,
             headers=headers,
             json={"inputs": prompt},
-            timeout=30
-        )
-        
-        if response.status_code == 503:
-            print("⏳ Model is loading on HuggingFace servers, this may take ~20 seconds...")
-            import time
-            time.sleep(20)
-            response = requests.post(API_URL, headers=headers, json={"inputs": prompt}, timeout=30)
-        
-        if response.status_code != 200:
-            error_msg = response.json().get('error', 'Unknown error')
-            print(f"❌ HuggingFace API error: {error_msg}")
-            return None
-        
-        image_data = response.content
-        
-        # Create unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_prompt = "".join(c if (c.isascii() and (c.isalnum() or c in (' ', '-', '_'))) else '_' for c in prompt[:50])
-        safe_prompt = safe_prompt.strip().replace(' ', '_')
-        filename = f"{timestamp}_HF_{safe_prompt}.png"
-        
-        # Save
-        output_dir_expanded = Path(output_dir).expanduser()
-        output_path = output_dir_expanded / filename
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, 'wb') as f:
-            f.write(image_data)
+            timeout=30,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                error_msg = _hf_error_message(response.text)
+                print(f"❌ HuggingFace API error: {error_msg}")
+                return None
+            
+            _record_hf_success(model)
+            response.raw.decode_content = True
+            output_path = _save_png(response.raw, output_dir, prompt, 'HF')
         
         print(f"✅ Successfully saved: {output_path}")
         print(f"💰 Cost: $0.00 (free)")
         
-        return str(output_path)
+        return output_path
         
     except Exception as e:
         print(f"❌ Error generating via HuggingFace: {e}")
         return None
 
 
+def generate_images_huggingface_batch(prompts, hf_token, model="black-forest-labs/FLUX.1-schnell", output_dir="~/Downloads", concurrency=4):
+    """
+    Generate several images via Hugging Face concurrently (FREE!)
+    
+    All requests share the pooled HTTP session, so connections are reused.
+    
+    Args:
+        prompts: List of text descriptions
+        hf_token: Hugging Face API token
+        model: HuggingFace model name
+        output_dir: Directory to save the images
+        concurrency: Number of requests in flight at once
+    
+    Returns:
+        List with the saved file path (or None on error) for each prompt
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(
+            lambda prompt: generate_image_huggingface(prompt, hf_token, model=model, output_dir=output_dir),
+            prompts
+        ))
+
+
+class _BlockingStreamReader:
+    """File-like view of an aiohttp response body for a worker thread (see _gen_hf_async)"""
+    
+    def __init__(self, stream, loop):
+        self._stream = stream
+        self._loop = loop
+    
+    def read(self, size=-1):
+        return asyncio.run_coroutine_threadsafe(self._stream.read(size), self._loop).result()
+
+
+async def _gen_hf_async(session, prompt, hf_token, model, output_dir):
+    """Generate one image via Hugging Face on an aiohttp session, see generate_image_huggingface"""
+    print(f"🎨 Generating image via Hugging Face: {prompt}")
+    
+    try:
+        API_URL = f"https://api-inference.huggingface.co/models/{model}"
+        headers = {"Authorization": f"Bearer {hf_token}"}
+        # Same schedule as the sync session: Retry-After if sent, else urllib3's backoff
+        # State file I/O runs off the event loop
+        backoff = await asyncio.to_thread(_hf_backoff, model)
+        retry = Retry(total=_RETRY_TOTAL, backoff_factor=backoff)
+        
+        for attempt in range(_RETRY_TOTAL + 1):
+            async with session.post(API_URL, headers=headers, json={"inputs": prompt}) as response:
+                # Model is loading or rate limited - release the connection and retry
+                should_retry = response.status in _RETRY_STATUSES and attempt < _RETRY_TOTAL
+                if not should_retry:
+                    if response.status != 200:
+                        error_msg = _hf_error_message(await response.text())
+                        print(f"❌ HuggingFace API error: {error_msg}")
+                        return None
+                    
+                    await asyncio.to_thread(_record_hf_success, model)
+                    # Disk writes and the page-cache sync block, so save in a worker
+                    # thread that pulls the body from the loop
+                    source = _BlockingStreamReader(response.content, asyncio.get_running_loop())
+                    output_path = await asyncio.to_thread(_save_png, source, output_dir, prompt, 'HF')
+                    
+                    print(f"✅ Successfully saved: {output_path}")
+                    return output_path
+                
+                retry = retry.increment('POST', API_URL)
+                delay = retry.get_retry_after(response)
+                if delay is None:
+                    delay = retry.get_backoff_time()
+                _print_retry_notice(response.status, delay)
+            
+            await asyncio.sleep(delay)
+    
+    except Exception as e:
+        print(f"❌ Error generating via HuggingFace: {e}")
+        return None
+
+
+async def generate_images_huggingface_async(prompts, hf_token, model="black-forest-labs/FLUX.1-schnell", output_dir="~/Downloads", concurrency=4):
+    """
+    Generate several images via Hugging Face with aiohttp (FREE!)
+    
+    Same as generate_images_huggingface_batch, but all requests run on one
+    event loop over a shared keep-alive connector. Requires aiohttp.
+    
+    Returns:
+        List with the saved file path (or None on error) for each prompt
+    """
+    import aiohttp
+    
+    # Queue prompts on a semaphore rather than in the connector, so time spent
+    # waiting for a free slot does not count against the request timeouts
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def generate(prompt):
+        async with semaphore:
+            return await _gen_hf_async(session, prompt, hf_token, model, output_dir)
+    
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=_DNS_CACHE_TTL, keepalive_timeout=60)
+    # Same per-operation limits as the sync path (timeout=30), no overall cap
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        return await asyncio.gather(*[generate(prompt) for prompt in prompts])
+
+
 def generate_image_openai(prompt, api_key, size="1024x1024", quality="standard", model="dall-e-2", output_dir="~/Downloads"):
     """
     Generate image via OpenAI DALL-E API (paid)
@@ -155,6 +536,8 @@ def generate_image_openai(prompt, api_key, size="1024x1024", quality="standard",
             "prompt": prompt,
             "size": size,
             "n": 1,
+            # Return image bytes inline instead of a URL to download separately
+            "response_format": "b64_json",
         }
         
         # Quality parameter is only supported in DALL-E 3
@@ -163,53 +546,58 @@ def generate_image_openai(prompt, api_key, size="1024x1024", quality="standard",
         
         response = client.images.generate(**request_params)
         
-        # Get image URL
-        image_url = response.data[0].url
-        
-        # Download image
-        import requests
-        image_data = requests.get(image_url).content
-        
-        # Create unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        # Keep only ASCII characters, digits and basic punctuation
-        safe_prompt = "".join(c if (c.isascii() and (c.isalnum() or c in (' ', '-', '_'))) else '_' for c in prompt[:50])
-        safe_prompt = safe_prompt.strip().replace(' ', '_')
-        filename = f"{timestamp}_{safe_prompt}.png"
-        
-        # Save
-        # Expand ~ to full path
-        output_dir_expanded = Path(output_dir).expanduser()
-        output_path = output_dir_expanded / filename
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, 'wb') as f:
-            f.write(image_data)
+        # Decode and save image
+        image_data = base64.b64decode(response.data[0].b64_json)
+        output_path = _save_png(io.BytesIO(image_data), output_dir, prompt)
         
         print(f"✅ Successfully saved: {output_path}")
-        print(f"🔗 Original URL: {image_url}")
         
-        # Cost information
-        if model == "dall-e-3":
-            cost = 0.04 if quality == "standard" else 0.08
-            if size in ["1792x1024", "1024x1792"]:
-                cost *= 2
-        else:  # dall-e-2
-            cost = 0.02 if size == "1024x1024" else 0.018
+        # Cost information (DALL-E 2 has a single quality level)
+        cost_quality = quality if model == "dall-e-3" else "standard"
+        cost = _DALLE_COST.get((model, cost_quality, size), 0.0)
         
         print(f"💰 Request cost: ${cost:.3f}")
         
-        return str(output_path)
+        return output_path
         
     except Exception as e:
-        import traceback
         print(f"❌ Error generating via OpenAI: {e}")
         print("\nError details:")
         traceback.print_exc()
         return None
 
 
-def main():
+def _preimport(argv):
+    """
+    Import slow optional modules in a background thread
+    
+    openai (for --provider openai) and aiohttp (for --prompts-file) take
+    hundreds of ms to import; starting early overlaps that with argument
+    parsing and key loading. Later imports then hit sys.modules.
+    """
+    modules = []
+    if '--provider=openai' in argv or any(
+        arg == '--provider' and value == 'openai' for arg, value in zip(argv, argv[1:])
+    ):
+        modules.append('openai')
+    if any(arg == '--prompts-file' or arg.startswith('--prompts-file=') for arg in argv):
+        modules.append('aiohttp')
+    if not modules:
+        return
+    
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass  # reported later where the module is needed
+    
+    threading.Thread(target=run, daemon=True).start()
+
+
+@lru_cache(maxsize=1)
+def _build_parser():
+    """Build the command line parser (once per process)"""
     parser = argparse.ArgumentParser(
         description='Image generator via HuggingFace (free) or OpenAI DALL-E (paid)',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -218,6 +606,9 @@ Usage examples:
   # Free via HuggingFace (default)
   python generate_image.py "Cat in space with pizza"
   
+  # Several prompts (one per line) in one run via HuggingFace
+  python generate_image.py --prompts-file prompts.txt --concurrency 4
+  
   # Explicitly use DALL-E
   python generate_image.py "Sunset over mountains" --provider openai
   python generate_image.py "Abstract art" --provider openai --quality hd --model dall-e-3
@@ -227,9 +618,23 @@ Usage examples:
     parser.add_argument(
         'prompt',
         type=str,
+        nargs='?',
         help='Description of the image to generate'
     )
     
+    parser.add_argument(
+        '--prompts-file',
+        type=str,
+        help='File with one prompt per line to generate in one run (HuggingFace only)'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='Parallel HuggingFace requests with --prompts-file (default: 4)'
+    )
+    
     parser.add_argument(
         '--provider',
         type=str,
@@ -276,8 +681,36 @@ Usage examples:
         help='Folder to save images (default: ~/Downloads)'
     )
     
+    return parser
+
+
+def main():
+    # No arguments: print a short usage without building the full parser
+    if len(sys.argv) == 1:
+        print("usage: generate_image.py [options] prompt", file=sys.stderr)
+        print("       generate_image.py [options] --prompts-file FILE", file=sys.stderr)
+        print("Run with -h for all options", file=sys.stderr)
+        sys.exit(2)
+    
+    _preimport(sys.argv[1:])
+    
+    parser = _build_parser()
     args = parser.parse_args()
     
+    if not args.prompt and not args.prompts_file:
+        parser.error('a prompt or --prompts-file is required')
+    
+    if args.prompt and args.prompts_file:
+        parser.error('use either a prompt or --prompts-file, not both')
+    
+    if args.prompts_file:
+        if args.provider == 'openai':
+            parser.error('--prompts-file is only supported with the free HuggingFace provider')
+        if args.concurrency < 1:
+            parser.error('--concurrency must be at least 1')
+        # Batch mode never suggests paid OpenAI fallback
+        args.provider = 'huggingface'
+    
     # Load API keys
     api_keys = load_api_keys()
     
@@ -286,6 +719,43 @@ Usage examples:
     # Provider selection logic
     if args.provider == 'auto' or args.provider == 'huggingface':
         # Try HuggingFace
+        if api_keys['huggingface'] and args.prompts_file:
+            try:
+                with open(args.prompts_file, 'r', encoding='utf-8') as f:
+                    prompts = [line.strip() for line in f if line.strip()]
+            except OSError as e:
+                print(f"❌ Cannot read prompts file: {e}")
+                sys.exit(1)
+            
+            if not prompts:
+                parser.error(f'no prompts found in {args.prompts_file}')
+            
+            # Use asyncio + aiohttp when available, a thread pool otherwise
+            if importlib.util.find_spec('aiohttp') is not None:
+                results = asyncio.run(generate_images_huggingface_async(
+                    prompts=prompts,
+                    hf_token=api_keys['huggingface'],
+                    model=args.hf_model,
+                    output_dir=args.output_dir,
+                    concurrency=args.concurrency
+                ))
+            else:
+                results = generate_images_huggingface_batch(
+                    prompts=prompts,
+                    hf_token=api_keys['huggingface'],
+                    model=args.hf_model,
+                    output_dir=args.output_dir,
+                    concurrency=args.concurrency
+                )
+            
+            failed = results.count(None)
+            if not failed:
+                print(f"\n✅ Generated {len(results)} images via HuggingFace")
+                sys.exit(0)
+            
+            print(f"\n❌ {failed} of {len(results)} images failed to generate via HuggingFace")
+            sys.exit(1)
+        
         if api_keys['huggingface']:
             result = generate_image_huggingface(
                 prompt=args.prompt,
@@ -336,6 +806,12 @@ Usage examples:
             print("\nGet key: https://platform.openai.com/api-keys")
             sys.exit(1)
         
+        # openai is imported lazily (it is slow to import), so check it is installed up front
+        if importlib.util.find_spec('openai') is None:
+            print("\n❌ openai package is not installed!")
+            print("Install it with: pip3 install openai")
+            sys.exit(1)
+        
         # Validate parameters for DALL-E
         if args.model == 'dall-e-2' and args.quality == 'hd':
             print("⚠️  Warning: DALL-E 2 doesn't support HD quality, using standard")